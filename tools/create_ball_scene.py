@@ -1,41 +1,55 @@
 #!/usr/bin/env python3
 """
 Blender script to create a glass ball scene for tweaking.
-Run with: blender --background --python create_ball_scene.py
+Run with: blender --background --python create_ball_scene.py [-- --fast]
 
 Output: ball_scene.blend (open in Blender to tweak, then render with render_ball.py)
 """
 
+import argparse
 import bpy
+import bmesh
 import math
 import os
+import sys
 
 OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "ball_scene.blend")
 
+# Blender runs this file as a plain script: make the shared helpers importable
+sys.path.insert(0, OUTPUT_DIR)
+from render_common import setup_eevee  # noqa: E402
+
 def clear_scene():
     """Remove all objects from scene."""
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete()
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
 
     # Clear materials
     for material in bpy.data.materials:
         bpy.data.materials.remove(material)
 
+def link_object(name, data, location=(0, 0, 0)):
+    """Create an object for data (None for an empty) and link it into the scene."""
+    obj = bpy.data.objects.new(name, data)
+    obj.location = location
+    bpy.context.collection.objects.link(obj)
+    return obj
+
 def create_glass_ball():
     """Create a glass sphere with diagonal half white/half red - matching icon style."""
-    # Create UV sphere
-    bpy.ops.mesh.primitive_uv_sphere_add(
-        radius=1,
-        segments=64,
-        ring_count=32,
-        location=(0, 0, 0)
-    )
-    ball = bpy.context.active_object
-    ball.name = "GlassBall"
-
-    # Smooth shading
-    bpy.ops.object.shade_smooth()
+    # Create UV sphere directly through bmesh/bpy.data (no operator context
+    # or depsgraph update per call). 32x16 segments is already finer than
+    # the ~60 px silhouette of a 64 px sprite once smooth shaded.
+    mesh = bpy.data.meshes.new("GlassBall")
+    bm = bmesh.new()
+    bmesh.ops.create_uvsphere(bm, u_segments=32, v_segments=16, radius=1.0)
+    bm.to_mesh(mesh)
+    bm.free()
+    ball = link_object("GlassBall", mesh)
+
+    # Smooth shading, set for all faces in one foreach_set call
+    mesh.polygons.foreach_set("use_smooth", [True] * len(mesh.polygons))
 
     # Create material matching icon style - clean, polished look
     mat = bpy.data.materials.new(name="GlassMaterial")
@@ -83,24 +97,19 @@ def create_glass_ball():
     tex_coord = nodes.new('ShaderNodeTexCoord')
     tex_coord.location = (-600, 100)
 
-    # Separate XYZ to get coordinates
-    separate = nodes.new('ShaderNodeSeparateXYZ')
-    separate.location = (-400, 100)
-    links.new(tex_coord.outputs['Object'], separate.inputs['Vector'])
-
-    # Add X + Y for diagonal (X + Y > 0 means top-right = white)
-    math_add = nodes.new('ShaderNodeMath')
-    math_add.location = (-200, 100)
-    math_add.operation = 'ADD'
-    links.new(separate.outputs['X'], math_add.inputs[0])
-    links.new(separate.outputs['Y'], math_add.inputs[1])
+    # Diagonal in one node: dot(coords, (1, 1, 0)) = X + Y (> 0 means top-right = white)
+    diagonal = nodes.new('ShaderNodeVectorMath')
+    diagonal.location = (-300, 100)
+    diagonal.operation = 'DOT_PRODUCT'
+    diagonal.inputs[1].default_value = (1.0, 1.0, 0.0)
+    links.new(tex_coord.outputs['Object'], diagonal.inputs[0])
 
     # Sharp edge: use step function (greater than 0)
     math_step = nodes.new('ShaderNodeMath')
     math_step.location = (0, 100)
     math_step.operation = 'GREATER_THAN'
     math_step.inputs[1].default_value = 0.0  # Threshold at diagonal
-    links.new(math_add.outputs['Value'], math_step.inputs[0])
+    links.new(diagonal.outputs['Value'], math_step.inputs[0])
 
     # Mix the two halves
     mix_shader = nodes.new('ShaderNodeMixShader')
@@ -118,14 +127,21 @@ def create_glass_ball():
     return ball
 
 def create_background_plane():
-    """Create a white background plane for visualization."""
-    bpy.ops.mesh.primitive_plane_add(size=20, location=(0, 5, 0))
-    plane = bpy.context.active_object
-    plane.name = "BackgroundPlane"
+    """Create a white background plane for visualization (viewport only, never rendered)."""
+    mesh = bpy.data.meshes.new("BackgroundPlane")
+    mesh.from_pydata(
+        [(-10, -10, 0), (10, -10, 0), (10, 10, 0), (-10, 10, 0)],
+        [],
+        [(0, 1, 2, 3)]
+    )
+    plane = link_object("BackgroundPlane", mesh, location=(0, 5, 0))
 
     # Rotate to face camera
     plane.rotation_euler = (math.radians(90), 0, 0)
 
+    # Keep it out of renders so rays never intersect or shade it
+    plane.hide_render = True
+
     # Create emissive white material (self-lit)
     mat = bpy.data.materials.new(name="WhiteMaterial")
     mat.use_nodes = True
@@ -153,9 +169,7 @@ def create_background_plane():
 def setup_lighting():
     """Create studio lighting - with visible highlights and shadows for roundness."""
     # Main key light (upper left for specular highlight)
-    bpy.ops.object.light_add(type='AREA', location=(-2, -3, 3))
-    key_light = bpy.context.active_object
-    key_light.name = "KeyLight"
+    key_light = link_object("KeyLight", bpy.data.lights.new("KeyLight", type='AREA'), location=(-2, -3, 3))
     key_light.data.energy = 120  # Stronger for visible highlight
     key_light.data.size = 1.5  # Smaller for sharper, more defined highlight
     key_light.data.color = (1.0, 1.0, 1.0)
@@ -163,17 +177,13 @@ def setup_lighting():
     key_light.rotation_euler = (math.radians(45), math.radians(-30), 0)
 
     # Soft fill light (lower, opposite side) - reduced to create more shadow
-    bpy.ops.object.light_add(type='AREA', location=(3, -2, -1))
-    fill_light = bpy.context.active_object
-    fill_light.name = "FillLight"
+    fill_light = link_object("FillLight", bpy.data.lights.new("FillLight", type='AREA'), location=(3, -2, -1))
     fill_light.data.energy = 15  # Lower for more shadow contrast
     fill_light.data.size = 5
     fill_light.data.color = (1.0, 1.0, 1.0)
 
     # Rim light (behind, subtle edge definition)
-    bpy.ops.object.light_add(type='AREA', location=(0, 3, 0))
-    rim_light = bpy.context.active_object
-    rim_light.name = "RimLight"
+    rim_light = link_object("RimLight", bpy.data.lights.new("RimLight", type='AREA'), location=(0, 3, 0))
     rim_light.data.energy = 25  # Slight increase for edge definition
     rim_light.data.size = 4
 
@@ -188,9 +198,7 @@ def setup_lighting():
 
 def setup_camera():
     """Set up orthographic camera for sprite rendering."""
-    bpy.ops.object.camera_add(location=(0, -5, 0))
-    camera = bpy.context.active_object
-    camera.name = "SpriteCamera"
+    camera = link_object("SpriteCamera", bpy.data.cameras.new("SpriteCamera"), location=(0, -5, 0))
 
     # Point at origin
     camera.rotation_euler = (math.radians(90), 0, 0)
@@ -212,15 +220,30 @@ def setup_camera():
 
     return camera
 
-def setup_render_settings():
-    """Configure render settings for sprite output."""
+def setup_render_settings(fast=False):
+    """Configure render settings for sprite output (Eevee preview if fast)."""
     scene = bpy.context.scene
 
-    # Render engine - Cycles for quality
-    scene.render.engine = 'CYCLES'
+    # Render engine - Cycles for quality, Eevee for quick previews
+    if fast:
+        setup_eevee()
+    else:
+        scene.render.engine = 'CYCLES'
+
     scene.cycles.samples = 256  # Good quality without excessive render time
     scene.cycles.use_denoising = True  # Use denoiser for cleaner result
 
+    # Prefer the GPU (devices are picked by the render scripts) and stop
+    # sampling pixels once they converge (samples is the upper bound)
+    scene.cycles.device = 'GPU'
+    scene.cycles.use_adaptive_sampling = True
+    scene.cycles.adaptive_threshold = 0.01
+    scene.cycles.adaptive_min_samples = 32
+
+    # Keep scene data, shaders and BVH between frames; a frame is one tile
+    scene.render.use_persistent_data = True
+    scene.cycles.tile_size = 64
+
     # Output settings
     scene.render.resolution_x = 64
     scene.render.resolution_y = 64
@@ -238,9 +261,8 @@ def animate_ball(ball):
     scene.frame_end = 25
 
     # Create an empty to act as the tilted rotation axis
-    bpy.ops.object.empty_add(type='PLAIN_AXES', location=(0, 0, 0))
-    axis_empty = bpy.context.active_object
-    axis_empty.name = "RotationAxis"
+    axis_empty = link_object("RotationAxis", None)
+    axis_empty.empty_display_type = 'PLAIN_AXES'
 
     # Tilt the empty 45 around Y - this tilts the rotation axis
     axis_empty.rotation_euler = (0, math.radians(45), 0)
@@ -252,24 +274,41 @@ def animate_ball(ball):
     # Reset ball rotation (it will inherit the tilt from parent)
     ball.rotation_euler = (0, 0, 0)
 
-    # Animate the ball's local Z rotation
-    ball.rotation_euler = (0, 0, 0)
-    ball.keyframe_insert(data_path="rotation_euler", frame=1)
-
-    ball.rotation_euler = (0, 0, math.radians(360))
-    ball.keyframe_insert(data_path="rotation_euler", frame=26)
-
-    # Set linear interpolation for smooth rotation (Blender 5.0 API may differ)
-    try:
-        if ball.animation_data and ball.animation_data.action:
-            for fcurve in ball.animation_data.action.fcurves:
-                for keyframe in fcurve.keyframe_points:
-                    keyframe.interpolation = 'LINEAR'
-    except (AttributeError, TypeError):
-        pass  # Skip if API changed
-
+    # Drive the ball's local Z rotation straight from the frame number: one
+    # full turn over the sprite frames, frame 1 at 0 degrees. The driver just
+    # reads the current frame; a linear Generator modifier on its F-curve maps
+    # it to the angle in closed form. No keyframes, no action/fcurve API and
+    # no expression to evaluate.
+    fcurve = ball.driver_add("rotation_euler", 2)
+    driver = fcurve.driver
+    driver.type = 'AVERAGE'
+    frame_var = driver.variables.new()
+    frame_var.name = "frame"
+    frame_var.type = 'SINGLE_PROP'
+    frame_var.targets[0].id_type = 'SCENE'
+    frame_var.targets[0].id = scene
+    frame_var.targets[0].data_path = "frame_current"
+
+    for modifier in list(fcurve.modifiers):
+        fcurve.modifiers.remove(modifier)
+    step = 2 * math.pi / 25
+    generator = fcurve.modifiers.new('GENERATOR')
+    generator.mode = 'POLYNOMIAL'
+    generator.poly_order = 1
+    generator.coefficients = (-step, step)  # (frame - 1) * step
+
+
+def parse_args():
+    """Parse script arguments (everything after '--' on the Blender command line)."""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--fast", action="store_true",
+                        help="render with Eevee instead of Cycles (quick previews)")
+    return parser.parse_args(argv)
 
 def main():
+    args = parse_args()
+
     print("=" * 50)
     print("Glass Ball Scene Creator")
     print("=" * 50)
@@ -279,7 +318,7 @@ def main():
     create_background_plane()
     setup_lighting()
     setup_camera()
-    setup_render_settings()
+    setup_render_settings(fast=args.fast)
     animate_ball(ball)
 
     # Save the blend file
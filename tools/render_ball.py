@@ -1,44 +1,66 @@
 #!/usr/bin/env python3
 """
 Blender script to render a glass ball animation sprite sheet.
-Run with: blender --background --python render_ball.py
+Run with: blender --background --python render_ball.py [-- --fast] [--rebuild] [--workers N]
 
 Output: ball_spritesheet.png (horizontal strip of 25 frames)
+
+The built scene is cached in ball_render_cache.blend and reused until this
+script changes (or --rebuild is given), so re-renders skip scene construction.
 """
 
 import bpy
+import bmesh
 import math
 import os
+import sys
+
+import numpy as np
 
 # Configuration
 FRAME_COUNT = 25
 FRAME_SIZE = 64  # pixels per frame
 OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "..", "assets", "themes", "classic", "ball_new.png")
+SCENE_CACHE = os.path.join(OUTPUT_DIR, "ball_render_cache.blend")
+
+# Blender runs this file as a plain script: make the shared helpers importable
+sys.path.insert(0, OUTPUT_DIR)
+from render_common import (  # noqa: E402
+    default_workers, parse_script_args, render_arg_parser, render_sprite_sheet,
+    setup_eevee, setup_gpu,
+)
 
 def clear_scene():
     """Remove all objects from scene."""
-    bpy.ops.object.select_all(action='SELECT')
-    bpy.ops.object.delete()
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
 
     # Clear materials
     for material in bpy.data.materials:
         bpy.data.materials.remove(material)
 
+def link_object(name, data, location=(0, 0, 0)):
+    """Create an object for data (None for an empty) and link it into the scene."""
+    obj = bpy.data.objects.new(name, data)
+    obj.location = location
+    bpy.context.collection.objects.link(obj)
+    return obj
+
 def create_glass_ball():
     """Create a glass sphere with diagonal half white/half red glass."""
-    # Create UV sphere
-    bpy.ops.mesh.primitive_uv_sphere_add(
-        radius=1,
-        segments=64,
-        ring_count=32,
-        location=(0, 0, 0)
-    )
-    ball = bpy.context.active_object
-    ball.name = "GlassBall"
-
-    # Smooth shading
-    bpy.ops.object.shade_smooth()
+    # Create UV sphere directly through bmesh/bpy.data (no operator context
+    # or depsgraph update per call). 32x16 segments is already finer than
+    # the ~60 px silhouette of a 64 px sprite once smooth shaded.
+    mesh = bpy.data.meshes.new("GlassBall")
+    bm = bmesh.new()
+    bmesh.ops.create_uvsphere(bm, u_segments=32, v_segments=16, radius=1.0)
+    bm.to_mesh(mesh)
+    bm.free()
+    ball = link_object("GlassBall", mesh)
+
+    # Smooth shading, set for all faces in one foreach_set call
+    mesh.polygons.foreach_set("use_smooth", np.ones(len(mesh.polygons), dtype=bool))
 
     # Create glass material
     mat = bpy.data.materials.new(name="GlassMaterial")
@@ -51,144 +73,80 @@ def create_glass_ball():
 
     # Output node
     output = nodes.new('ShaderNodeOutputMaterial')
-    output.location = (600, 0)
-
-    # --- White milky half (80% color, 20% transparent) ---
-    # Glossy white (opaque colored part)
-    glossy_white = nodes.new('ShaderNodeBsdfGlossy')
-    glossy_white.location = (-400, 300)
-    glossy_white.inputs['Color'].default_value = (0.95, 0.95, 0.95, 1.0)  # White
-    glossy_white.inputs['Roughness'].default_value = 0.3  # Milky/soft
-
-    # Glass for transparency
-    glass_white = nodes.new('ShaderNodeBsdfGlass')
-    glass_white.location = (-400, 150)
-    glass_white.inputs['Color'].default_value = (1.0, 1.0, 1.0, 1.0)
-    glass_white.inputs['Roughness'].default_value = 0.0  # Sharp glass
-    glass_white.inputs['IOR'].default_value = 1.45
-
-    # Mix: 80% glossy (color), 20% glass (transparent)
-    mix_white = nodes.new('ShaderNodeMixShader')
-    mix_white.location = (-200, 200)
-    mix_white.inputs['Fac'].default_value = 0.2  # 20% glass = 80% color
-    links.new(glossy_white.outputs['BSDF'], mix_white.inputs[1])
-    links.new(glass_white.outputs['BSDF'], mix_white.inputs[2])
-
-    # --- Red colorful half (80% color, 20% transparent) ---
-    # Glossy red (opaque colored part)
-    glossy_red = nodes.new('ShaderNodeBsdfGlossy')
-    glossy_red.location = (-400, -100)
-    glossy_red.inputs['Color'].default_value = (0.532, 0.0, 0.0, 1.0)  # Deep red
-    glossy_red.inputs['Roughness'].default_value = 0.15  # Shiny
-
-    # Glass for transparency
-    glass_red = nodes.new('ShaderNodeBsdfGlass')
-    glass_red.location = (-400, -250)
-    glass_red.inputs['Color'].default_value = (1.0, 0.3, 0.3, 1.0)  # Tinted
-    glass_red.inputs['Roughness'].default_value = 0.0  # Sharp glass
-    glass_red.inputs['IOR'].default_value = 1.45
-
-    # Mix: 80% glossy (color), 20% glass (transparent)
-    mix_red = nodes.new('ShaderNodeMixShader')
-    mix_red.location = (-200, -100)
-    mix_red.inputs['Fac'].default_value = 0.2  # 20% glass = 80% color
-    links.new(glossy_red.outputs['BSDF'], mix_red.inputs[1])
-    links.new(glass_red.outputs['BSDF'], mix_red.inputs[2])
+    output.location = (400, 0)
 
     # --- Diagonal gradient for mixing ---
     # Use object coordinates
     tex_coord = nodes.new('ShaderNodeTexCoord')
-    tex_coord.location = (-600, 0)
-
-    # Separate XYZ to get coordinates
-    separate = nodes.new('ShaderNodeSeparateXYZ')
-    separate.location = (-400, 0)
-    links.new(tex_coord.outputs['Object'], separate.inputs['Vector'])
+    tex_coord.location = (-800, 0)
 
-    # Add X + Y for diagonal (X + Y > 0 means top-right)
-    math_add = nodes.new('ShaderNodeMath')
-    math_add.location = (-200, 0)
-    math_add.operation = 'ADD'
-    links.new(separate.outputs['X'], math_add.inputs[0])
-    links.new(separate.outputs['Y'], math_add.inputs[1])
+    # Diagonal in one node: dot(coords, (1, 1, 0)) = X + Y (> 0 means top-right)
+    diagonal = nodes.new('ShaderNodeVectorMath')
+    diagonal.location = (-600, 0)
+    diagonal.operation = 'DOT_PRODUCT'
+    diagonal.inputs[1].default_value = (1.0, 1.0, 0.0)
+    links.new(tex_coord.outputs['Object'], diagonal.inputs[0])
 
     # Sharp edge: use step function (greater than 0)
     math_step = nodes.new('ShaderNodeMath')
-    math_step.location = (0, 0)
+    math_step.location = (-400, 0)
     math_step.operation = 'GREATER_THAN'
     math_step.inputs[1].default_value = 0.0  # Threshold at diagonal
-    links.new(math_add.outputs['Value'], math_step.inputs[0])
-
-    # Mix the two halves (white and red, each already 80% color / 20% glass)
-    mix_shader = nodes.new('ShaderNodeMixShader')
-    mix_shader.location = (200, 0)
-    links.new(math_step.outputs['Value'], mix_shader.inputs['Fac'])
-    links.new(mix_white.outputs['Shader'], mix_shader.inputs[1])
-    links.new(mix_red.outputs['Shader'], mix_shader.inputs[2])
+    links.new(diagonal.outputs['Value'], math_step.inputs[0])
+
+    # --- Per-half parameters, picked by the diagonal (0 = white, 1 = red) ---
+    # Mix node sockets by index: Factor 0, A/B float 2/3, A/B color 6/7;
+    # results float 0, color 2
+    half_color = nodes.new('ShaderNodeMix')
+    half_color.location = (-200, 150)
+    half_color.data_type = 'RGBA'
+    half_color.inputs[6].default_value = (0.95, 0.95, 0.95, 1.0)  # White
+    half_color.inputs[7].default_value = (0.532, 0.0, 0.0, 1.0)  # Deep red
+    links.new(math_step.outputs['Value'], half_color.inputs[0])
+
+    half_roughness = nodes.new('ShaderNodeMix')
+    half_roughness.location = (-200, -150)
+    half_roughness.data_type = 'FLOAT'
+    half_roughness.inputs[2].default_value = 0.3  # Milky/soft
+    half_roughness.inputs[3].default_value = 0.15  # Shiny
+    links.new(math_step.outputs['Value'], half_roughness.inputs[0])
+
+    # --- One BSDF for both halves: 80% colored gloss, 20% glass ---
+    # Metallic carries the tinted glossy reflection; the remaining 20% is
+    # fully transmissive glass. Replaces 2x (Glossy + Glass) plus three mix
+    # shaders, so each hit evaluates one BSDF with one refraction branch.
+    bsdf = nodes.new('ShaderNodeBsdfPrincipled')
+    bsdf.location = (100, 0)
+    bsdf.inputs['Metallic'].default_value = 0.8  # 80% color
+    bsdf.inputs['Transmission Weight'].default_value = 1.0  # Rest is glass
+    bsdf.inputs['IOR'].default_value = 1.45
+    links.new(half_color.outputs[2], bsdf.inputs['Base Color'])
+    links.new(half_roughness.outputs[0], bsdf.inputs['Roughness'])
 
     # Connect directly to output (no fresnel - cleaner edges)
-    links.new(mix_shader.outputs['Shader'], output.inputs['Surface'])
+    links.new(bsdf.outputs['BSDF'], output.inputs['Surface'])
 
     # Assign material
     ball.data.materials.append(mat)
 
     return ball
 
-def create_background_plane():
-    """Create a white background plane for visualization (remove for final render)."""
-    bpy.ops.mesh.primitive_plane_add(size=20, location=(0, 5, 0))
-    plane = bpy.context.active_object
-    plane.name = "BackgroundPlane"
-
-    # Rotate to face camera
-    plane.rotation_euler = (math.radians(90), 0, 0)
-
-    # Create emissive white material (self-lit)
-    mat = bpy.data.materials.new(name="WhiteMaterial")
-    mat.use_nodes = True
-    nodes = mat.node_tree.nodes
-    links = mat.node_tree.links
-
-    # Clear default nodes
-    nodes.clear()
-
-    # Emission shader for bright white
-    emission = nodes.new('ShaderNodeEmission')
-    emission.location = (0, 0)
-    emission.inputs['Color'].default_value = (1.0, 1.0, 1.0, 1.0)
-    emission.inputs['Strength'].default_value = 1.0  # White background
-
-    # Output
-    output = nodes.new('ShaderNodeOutputMaterial')
-    output.location = (200, 0)
-    links.new(emission.outputs['Emission'], output.inputs['Surface'])
-
-    plane.data.materials.append(mat)
-    return plane
-
-
 def setup_lighting():
     """Create studio lighting for the ball."""
     # Key light (main)
-    bpy.ops.object.light_add(type='AREA', location=(3, -2, 4))
-    key_light = bpy.context.active_object
-    key_light.name = "KeyLight"
+    key_light = link_object("KeyLight", bpy.data.lights.new("KeyLight", type='AREA'), location=(3, -2, 4))
     key_light.data.energy = 80
     key_light.data.size = 4
     key_light.data.color = (1.0, 1.0, 1.0)
 
     # Fill light (softer, opposite side)
-    bpy.ops.object.light_add(type='AREA', location=(-3, 2, 2))
-    fill_light = bpy.context.active_object
-    fill_light.name = "FillLight"
+    fill_light = link_object("FillLight", bpy.data.lights.new("FillLight", type='AREA'), location=(-3, 2, 2))
     fill_light.data.energy = 40
     fill_light.data.size = 4
     fill_light.data.color = (1.0, 1.0, 1.0)
 
     # Rim light (behind, for edge definition)
-    bpy.ops.object.light_add(type='AREA', location=(0, 3, 1))
-    rim_light = bpy.context.active_object
-    rim_light.name = "RimLight"
+    rim_light = link_object("RimLight", bpy.data.lights.new("RimLight", type='AREA'), location=(0, 3, 1))
     rim_light.data.energy = 25
     rim_light.data.size = 2
 
@@ -203,9 +161,7 @@ def setup_lighting():
 
 def setup_camera():
     """Set up orthographic camera for sprite rendering."""
-    bpy.ops.object.camera_add(location=(0, -5, 0))
-    camera = bpy.context.active_object
-    camera.name = "SpriteCamera"
+    camera = link_object("SpriteCamera", bpy.data.cameras.new("SpriteCamera"), location=(0, -5, 0))
 
     # Point at origin
     camera.rotation_euler = (math.radians(90), 0, 0)
@@ -218,14 +174,43 @@ def setup_camera():
 
     return camera
 
-def setup_render_settings():
-    """Configure render settings for sprite output."""
+def setup_render_settings(fast=False):
+    """Configure render settings for sprite output (Eevee preview if fast)."""
     scene = bpy.context.scene
 
-    # Render engine
-    scene.render.engine = 'CYCLES'
-    scene.cycles.samples = 512  # High samples for sharp result
-    scene.cycles.use_denoising = False  # Denoiser causes blur
+    # Render engine - Eevee for quick previews, Cycles for the final sprites
+    if fast:
+        setup_eevee()
+    else:
+        scene.render.engine = 'CYCLES'
+        setup_gpu()
+
+    # Few samples plus OpenImageDenoise. Feeding it albedo and normal passes
+    # keeps the sharp diagonal color edge that plain denoising blurred.
+    scene.cycles.samples = 32
+    scene.cycles.use_denoising = True
+    scene.cycles.denoiser = 'OPENIMAGEDENOISE'
+    scene.cycles.denoising_input_passes = 'RGB_ALBEDO_NORMAL'
+    scene.cycles.denoising_prefilter = 'ACCURATE'
+
+    # Stop sampling pixels once they converge (samples is the upper bound)
+    scene.cycles.use_adaptive_sampling = True
+    scene.cycles.adaptive_threshold = 0.01
+
+    # Keep scene data, shaders and BVH between frames; a frame is one tile
+    scene.render.use_persistent_data = True
+    scene.cycles.debug_use_spatial_splits = False  # Faster BVH updates
+    scene.cycles.tile_size = FRAME_SIZE
+
+    # A single ball seen through at most one glass shell doesn't need the
+    # default 12 bounces
+    scene.cycles.max_bounces = 4
+    scene.cycles.transmission_bounces = 2
+
+    # No particles in this scene today; simplify keeps child particles out
+    # of the render should any be added
+    scene.render.use_simplify = True
+    scene.render.simplify_child_particles_render = 0.0
 
     # Output settings
     scene.render.resolution_x = FRAME_SIZE
@@ -234,8 +219,6 @@ def setup_render_settings():
 
     # Transparent background
     scene.render.film_transparent = True
-    scene.render.image_settings.file_format = 'PNG'
-    scene.render.image_settings.color_mode = 'RGBA'
 
 def animate_ball(ball):
     """Add rotation animation to the ball using a parent empty for tilted axis."""
@@ -244,9 +227,8 @@ def animate_ball(ball):
     scene.frame_end = FRAME_COUNT
 
     # Create an empty to act as the tilted rotation axis
-    bpy.ops.object.empty_add(type='PLAIN_AXES', location=(0, 0, 0))
-    axis_empty = bpy.context.active_object
-    axis_empty.name = "RotationAxis"
+    axis_empty = link_object("RotationAxis", None)
+    axis_empty.empty_display_type = 'PLAIN_AXES'
 
     # Tilt the empty 45° around Y - this tilts the rotation axis
     axis_empty.rotation_euler = (0, math.radians(45), 0)
@@ -258,102 +240,64 @@ def animate_ball(ball):
     # Reset ball rotation (it will inherit the tilt from parent)
     ball.rotation_euler = (0, 0, 0)
 
-    # Animate the ball's local Z rotation
-    ball.rotation_euler = (0, 0, 0)
-    ball.keyframe_insert(data_path="rotation_euler", frame=1)
-
-    ball.rotation_euler = (0, 0, math.radians(360))
-    ball.keyframe_insert(data_path="rotation_euler", frame=FRAME_COUNT + 1)
-
-    # Linear interpolation (skip if API changed in Blender 5.0+)
-    try:
-        if ball.animation_data and ball.animation_data.action:
-            action = ball.animation_data.action
-            for fcurve in action.fcurves:
-                for keyframe in fcurve.keyframe_points:
-                    keyframe.interpolation = 'LINEAR'
-    except (AttributeError, TypeError) as e:
-        print(f"Note: Could not set linear interpolation ({e}), using default")
-
-def render_sprite_sheet():
-    """Render all frames and combine into sprite sheet."""
-    import tempfile
-    import shutil
+    # Drive the ball's local Z rotation straight from the frame number: one
+    # full turn over the sprite frames, frame 1 at 0 degrees. The driver just
+    # reads the current frame; a linear Generator modifier on its F-curve maps
+    # it to the angle in closed form. No keyframes, no action/fcurve API and
+    # no expression to evaluate.
+    fcurve = ball.driver_add("rotation_euler", 2)
+    driver = fcurve.driver
+    driver.type = 'AVERAGE'
+    frame_var = driver.variables.new()
+    frame_var.name = "frame"
+    frame_var.type = 'SINGLE_PROP'
+    frame_var.targets[0].id_type = 'SCENE'
+    frame_var.targets[0].id = scene
+    frame_var.targets[0].data_path = "frame_current"
+
+    for modifier in list(fcurve.modifiers):
+        fcurve.modifiers.remove(modifier)
+    step = 2 * math.pi / FRAME_COUNT
+    generator = fcurve.modifiers.new('GENERATOR')
+    generator.mode = 'POLYNOMIAL'
+    generator.poly_order = 1
+    generator.coefficients = (-step, step)  # (frame - 1) * step
+
+def parse_args():
+    """Parse script arguments (everything after '--' on the Blender command line)."""
+    parser = render_arg_parser(__doc__)
+    parser.add_argument("--rebuild", action="store_true",
+                        help="rebuild the scene even if the cached .blend is up to date")
+    return parse_script_args(parser)
+
+def load_or_build_scene(rebuild=False):
+    """Open the cached scene, or build it and refresh the cache if it is stale."""
+    if (not rebuild and os.path.exists(SCENE_CACHE)
+            and os.path.getmtime(SCENE_CACHE) >= os.path.getmtime(__file__)):
+        print(f"Using cached scene: {SCENE_CACHE}")
+        bpy.ops.wm.open_mainfile(filepath=SCENE_CACHE)
+        return
 
-    scene = bpy.context.scene
-    temp_dir = tempfile.mkdtemp()
-
-    print(f"Rendering {FRAME_COUNT} frames...")
-
-    # Render each frame
-    for frame in range(1, FRAME_COUNT + 1):
-        scene.frame_set(frame)
-        scene.render.filepath = os.path.join(temp_dir, f"frame_{frame:03d}.png")
-        bpy.ops.render.render(write_still=True)
-        print(f"  Frame {frame}/{FRAME_COUNT}")
-
-    # Combine into horizontal sprite sheet
-    print("Combining into sprite sheet...")
-
-    # Load first frame to get dimensions
-    first_frame = bpy.data.images.load(os.path.join(temp_dir, "frame_001.png"))
-    width = first_frame.size[0]
-    height = first_frame.size[1]
-
-    # Create new image for sprite sheet
-    sheet = bpy.data.images.new(
-        name="SpriteSheet",
-        width=width * FRAME_COUNT,
-        height=height,
-        alpha=True
-    )
-
-    # Copy pixels from each frame
-    sheet_pixels = list(sheet.pixels)
-
-    for frame in range(1, FRAME_COUNT + 1):
-        frame_path = os.path.join(temp_dir, f"frame_{frame:03d}.png")
-        frame_img = bpy.data.images.load(frame_path)
-        frame_pixels = list(frame_img.pixels)
-
-        # Copy frame pixels to sprite sheet
-        x_offset = (frame - 1) * width
-        for y in range(height):
-            for x in range(width):
-                src_idx = (y * width + x) * 4
-                dst_idx = (y * width * FRAME_COUNT + x_offset + x) * 4
-                sheet_pixels[dst_idx:dst_idx+4] = frame_pixels[src_idx:src_idx+4]
-
-        bpy.data.images.remove(frame_img)
-
-    sheet.pixels = sheet_pixels
-
-    # Save sprite sheet
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    sheet.filepath_raw = OUTPUT_FILE
-    sheet.file_format = 'PNG'
-    sheet.save()
-
-    print(f"Sprite sheet saved to: {OUTPUT_FILE}")
-
-    # Cleanup
-    bpy.data.images.remove(first_frame)
-    bpy.data.images.remove(sheet)
-    shutil.rmtree(temp_dir)
+    clear_scene()
+    ball = create_glass_ball()
+    setup_lighting()
+    setup_camera()
+    animate_ball(ball)
+
+    bpy.ops.wm.save_as_mainfile(filepath=SCENE_CACHE)
+    print(f"Scene cached to: {SCENE_CACHE}")
 
 def main():
+    args = parse_args()
+
     print("=" * 50)
     print("Glass Ball Sprite Sheet Generator")
     print("=" * 50)
 
-    clear_scene()
-    ball = create_glass_ball()
-    create_background_plane()  # White background for visualization (remove for final)
-    setup_lighting()
-    setup_camera()
-    setup_render_settings()
-    animate_ball(ball)
-    render_sprite_sheet()
+    load_or_build_scene(rebuild=args.rebuild)
+    setup_render_settings(fast=args.fast)
+    workers = args.workers if args.workers is not None else default_workers(FRAME_COUNT)
+    render_sprite_sheet(OUTPUT_FILE, FRAME_COUNT, workers=workers)
 
     print("Done!")
 
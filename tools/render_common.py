@@ -0,0 +1,274 @@
+"""
+Render helpers shared by the ball sprite sheet scripts.
+
+Blender runs the scripts in this directory as plain files, not as a package,
+so they import this module after putting their own directory on sys.path.
+"""
+
+import argparse
+import bpy
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:  # Not bundled with Blender's Python
+    Image = None
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render_worker.py")
+SHM_DIR = "/dev/shm"
+
+
+def render_arg_parser(doc):
+    """Argument parser with the --fast/--workers options of the render scripts."""
+    parser = argparse.ArgumentParser(description=doc.strip().splitlines()[0])
+    parser.add_argument("--fast", action="store_true",
+                        help="render with Eevee instead of Cycles (quick previews)")
+    parser.add_argument("--workers", type=int,
+                        help="parallel Blender render processes (default: one per two "
+                             "CPU cores, one on the GPU)")
+    return parser
+
+
+def parse_script_args(parser):
+    """Parse script arguments (everything after '--' on the Blender command line)."""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    return parser.parse_args(argv)
+
+
+def setup_gpu():
+    """Render Cycles on the first available GPU backend; returns False if only CPU is available."""
+    scene = bpy.context.scene
+    prefs = bpy.context.preferences.addons['cycles'].preferences
+
+    for backend in ('OPTIX', 'CUDA', 'HIP', 'METAL', 'ONEAPI'):
+        try:
+            prefs.compute_device_type = backend
+        except TypeError:
+            continue  # Backend not known to this Blender build
+        prefs.get_devices()
+        if not any(device.type == backend for device in prefs.devices):
+            continue
+
+        for device in prefs.devices:
+            device.use = device.type == backend
+        scene.cycles.device = 'GPU'
+        print(f"Rendering on GPU ({backend})")
+        return True
+
+    scene.cycles.device = 'CPU'
+    print("No GPU found, rendering on CPU")
+    return False
+
+
+def setup_eevee():
+    """Switch to Eevee for fast rasterized previews instead of path tracing."""
+    scene = bpy.context.scene
+
+    # Eevee Next is registered as BLENDER_EEVEE_NEXT in Blender 4.2-4.x
+    try:
+        scene.render.engine = 'BLENDER_EEVEE_NEXT'
+    except TypeError:
+        scene.render.engine = 'BLENDER_EEVEE'
+
+    scene.eevee.taa_render_samples = 64  # Still clean at sprite size
+    if hasattr(scene.eevee, "use_raytracing"):
+        # Screen-space ray tracing for the glossy/glass look
+        scene.eevee.use_raytracing = True
+        scene.eevee.ray_tracing_options.screen_trace_quality = 0.5
+
+
+def default_workers(frame_count):
+    """Number of render processes: one per two CPU cores, one when rendering on the GPU."""
+    scene = bpy.context.scene
+    if scene.render.engine != 'CYCLES' or scene.cycles.device == 'GPU':
+        return 1  # Parallel processes would only contend for the GPU
+    return max(1, min(frame_count, (os.cpu_count() or 1) // 2))
+
+
+def setup_frame_output():
+    """Write frames as uncompressed half-float EXR, without passes nothing reads."""
+    scene = bpy.context.scene
+
+    # stitch_frames() and save_sheet() expect linear scene colors: the view
+    # transform is applied once, when the sheet is saved. Uncompressed half
+    # floats are close to a memcpy and plenty for 8-bit output.
+    image_settings = scene.render.image_settings
+    image_settings.file_format = 'OPEN_EXR'
+    image_settings.color_mode = 'RGBA'
+    image_settings.color_depth = '16'
+    image_settings.exr_codec = 'NONE'
+
+    # Only the combined RGBA is read back: skip the Z/mist/normal/vector
+    # passes and any compositor or sequencer post-processing
+    for view_layer in scene.view_layers:
+        view_layer.use_pass_z = False
+        view_layer.use_pass_mist = False
+        view_layer.use_pass_normal = False
+        view_layer.use_pass_vector = False
+    scene.render.use_compositing = False
+    scene.render.use_sequencer = False
+
+
+def render_frames(temp_dir, frame_count, workers=1):
+    """Render frames 1..frame_count into temp_dir, split across worker processes."""
+    setup_frame_output()
+
+    scene = bpy.context.scene
+    scene.frame_start = 1
+    scene.frame_end = frame_count
+    scene.frame_step = 1  # A .blend may skip frames; the sheet needs all of them
+    scene.render.filepath = os.path.join(temp_dir, "frame_")
+
+    workers = min(workers, frame_count)
+    if workers <= 1:
+        # One animation job keeps the render session (scene sync, shaders,
+        # BVH) warm between frames
+        bpy.ops.render.render(animation=True)
+        return
+
+    # Frames are independent: each worker renders a contiguous range from a
+    # snapshot of the fully configured scene, sharing the CPU cores
+    blend_path = os.path.join(temp_dir, "scene.blend")
+    bpy.ops.wm.save_as_mainfile(filepath=blend_path, copy=True)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+
+    processes = []
+    for worker in range(workers):
+        frame_start = 1 + worker * frame_count // workers
+        frame_end = (worker + 1) * frame_count // workers
+        # Blender exits with 0 after a Python exception unless told otherwise
+        process = subprocess.Popen([
+            bpy.app.binary_path, "--background", blend_path,
+            "--threads", str(threads),
+            "--python-exit-code", "1",
+            "--python", WORKER_SCRIPT, "--",
+            "--frame-start", str(frame_start),
+            "--frame-end", str(frame_end),
+            "--output-dir", temp_dir,
+        ])
+        processes.append((frame_start, frame_end, process))
+
+    failed = [f"{frame_start}-{frame_end}"
+              for frame_start, frame_end, process in processes if process.wait() != 0]
+    if failed:
+        raise RuntimeError(f"Render workers failed for frames {', '.join(failed)}")
+
+
+def stitch_frames(frame_count):
+    """Combine the frames written by render_frames() into one linear float strip."""
+    scene = bpy.context.scene
+
+    # Frame size as rendered (honours resolution_percentage)
+    width = scene.render.resolution_x * scene.render.resolution_percentage // 100
+    height = scene.render.resolution_y * scene.render.resolution_percentage // 100
+
+    # Horizontal strip, filled frame by frame (Blender pixel rows run bottom-up).
+    # Every column is written by exactly one frame, so skip zero-filling it.
+    sheet_np = np.empty((height, width * frame_count, 4), dtype=np.float32)
+
+    # One float32 buffer reused for every frame: foreach_get copies the pixels
+    # in C, with no per-frame allocation and no Python float objects
+    frame_np = np.empty(height * width * 4, dtype=np.float32)
+    frame_view = frame_np.reshape(height, width, 4)
+
+    # Frame file names depend only on the output path and format: build them once
+    frame_paths = [scene.render.frame_path(frame=frame) for frame in range(1, frame_count + 1)]
+
+    # One image datablock is pointed at each file in turn, instead of creating
+    # and freeing a datablock per frame
+    frame_img = bpy.data.images.load(frame_paths[0])
+    for index, frame_path in enumerate(frame_paths):
+        if index:
+            frame_img.filepath = frame_path
+            frame_img.reload()
+        frame_img.pixels.foreach_get(frame_np)
+
+        x_offset = index * width
+        sheet_np[:, x_offset:x_offset + width, :] = frame_view
+    bpy.data.images.remove(frame_img)
+
+    return sheet_np
+
+
+def uses_plain_srgb(scene):
+    """True if the scene's color management is a plain sRGB encode that NumPy can reproduce."""
+    view = scene.view_settings
+    return (scene.display_settings.display_device == 'sRGB'
+            and view.view_transform == 'Standard'
+            and view.look == 'None'
+            and view.exposure == 0.0
+            and view.gamma == 1.0
+            and not view.use_curve_mapping)
+
+
+def save_sheet(sheet_np, output_file):
+    """Save the linear, premultiplied float strip to output_file as an 8-bit RGBA PNG."""
+    scene = bpy.context.scene
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    height, width = sheet_np.shape[:2]
+
+    if Image is not None and uses_plain_srgb(scene):
+        # Encode straight from NumPy with Pillow, skipping the image datablock
+        # and Blender's colorspace pipeline: unpremultiply, sRGB-encode the
+        # color (alpha stays linear) and flip to top-down rows
+        rgb = sheet_np[..., :3]
+        alpha = sheet_np[..., 3:]
+        rgb = np.clip(np.divide(rgb, alpha, out=np.zeros_like(rgb), where=alpha > 0), 0.0, 1.0)
+        srgb = np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * np.power(rgb, 1 / 2.4) - 0.055)
+        rgba = np.concatenate([srgb, np.clip(alpha, 0.0, 1.0)], axis=-1)
+        pixels = (np.flipud(rgba) * 255.0 + 0.5).astype(np.uint8)
+        # uint8 (H, W, 4) is RGBA; zlib level 1 matches Blender's compression 15
+        Image.fromarray(pixels).save(output_file, compress_level=1)
+        return
+
+    # Otherwise let Blender write it: save_render applies the scene's view
+    # transform exactly like a direct PNG render would
+    sheet = bpy.data.images.new(
+        name="SpriteSheet",
+        width=width,
+        height=height,
+        alpha=True,
+        float_buffer=True
+    )
+    sheet.pixels.foreach_set(sheet_np.ravel())
+
+    image_settings = scene.render.image_settings
+    image_settings.file_format = 'PNG'
+    image_settings.color_mode = 'RGBA'
+    image_settings.color_depth = '8'
+    image_settings.compression = 15  # Fast encode
+    sheet.save_render(filepath=output_file, scene=scene)
+
+    bpy.data.images.remove(sheet)
+
+
+def render_sprite_sheet(output_file, frame_count, workers=1):
+    """Render all frames (in parallel with workers > 1) and combine into sprite sheet."""
+    scene = bpy.context.scene
+    width = scene.render.resolution_x * scene.render.resolution_percentage // 100
+    height = scene.render.resolution_y * scene.render.resolution_percentage // 100
+
+    # Frames are written as uncompressed half-float EXRs (close to a memcpy, no
+    # PNG encode/decode) and stitched below. Where a RAM-backed /dev/shm is
+    # available they never touch the disk.
+    temp_dir = tempfile.mkdtemp(dir=SHM_DIR if os.access(SHM_DIR, os.W_OK) else None)
+
+    # /dev/shm is RAM: drop partial frames and the worker snapshot even when a
+    # render, a worker or a frame load fails
+    try:
+        print(f"Rendering {frame_count} frames at {width}x{height}...")
+        render_frames(temp_dir, frame_count, workers)
+
+        print("Combining into sprite sheet...")
+        sheet_np = stitch_frames(frame_count)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    save_sheet(sheet_np, output_file)
+    print(f"Sprite sheet saved to: {output_file}")
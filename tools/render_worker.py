@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Render a range of sprite sheet frames in a background Blender process.
+Run with: blender --background scene.blend --python render_worker.py -- --frame-start 1 --frame-end 5 --output-dir DIR
+
+Started by render_common.render_frames() (for render_ball.py,
+render_from_blend.py and tweak_ball.py) to render disjoint frame ranges in
+parallel. The .blend must already carry the final render settings;
+frames are written as DIR/frame_####.<ext> for the parent to stitch.
+"""
+
+import argparse
+import bpy
+import os
+import sys
+
+
+def parse_args():
+    """Parse script arguments (everything after '--' on the Blender command line)."""
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frame-start", type=int, required=True)
+    parser.add_argument("--frame-end", type=int, required=True)
+    parser.add_argument("--output-dir", required=True)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    scene = bpy.context.scene
+
+    # One animation job per worker keeps the render session warm for its range
+    scene.frame_start = args.frame_start
+    scene.frame_end = args.frame_end
+    scene.frame_step = 1
+    scene.render.filepath = os.path.join(args.output_dir, "frame_")
+    bpy.ops.render.render(animation=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,26 @@
 #!/usr/bin/env python3
 """
 Tweak ball material and re-render.
-Run with: blender --background ball_scene.blend --python tweak_ball.py
+Run with: blender --background ball_scene.blend --python tweak_ball.py [-- --fast] [--workers N]
 """
 
 import bpy
 import os
-import tempfile
-import shutil
+import sys
 
 OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_FILE = os.path.join(OUTPUT_DIR, "..", "assets", "themes", "classic", "ball_new.png")
 FRAME_COUNT = 25
+# Share of the .blend's resolution to render; 100 keeps the game's 64px
+# frames, lower values give quicker test sheets
+RESOLUTION_PERCENTAGE = 100
+
+# Blender runs this file as a plain script: make the shared helpers importable
+sys.path.insert(0, OUTPUT_DIR)
+from render_common import (  # noqa: E402
+    default_workers, parse_script_args, render_arg_parser, render_sprite_sheet,
+    setup_eevee, setup_gpu,
+)
 
 
 def tweak_white_material():
@@ -27,9 +36,15 @@ def tweak_white_material():
         print("WhiteBSDF node not found!")
         return False
 
+    # Resolve each socket once; names stay valid across Blender versions,
+    # socket indices do not
+    inputs = white_bsdf.inputs
+    emission_strength = inputs['Emission Strength']
+    roughness = inputs['Roughness']
+
     # Bright white with diffuse gradient
-    white_bsdf.inputs['Emission Strength'].default_value = 0.85  # Brighter glow
-    white_bsdf.inputs['Roughness'].default_value = 0.25
+    emission_strength.default_value = 0.85  # Brighter glow
+    roughness.default_value = 0.25
     print(f"Set white emission to 0.85, roughness to 0.25")
 
     return True
@@ -51,84 +66,39 @@ def tweak_lighting():
         print(f"Set fill light energy to 10")
 
 
-def render_sprite_sheet():
-    """Render all frames and combine into sprite sheet."""
+def setup_render_for_sprite(fast=False):
+    """Configure transparent sprite output (Eevee preview if fast) and hide the background plane."""
     scene = bpy.context.scene
 
+    # Eevee preview overrides the .blend's engine; for Cycles, GPU device
+    # selection is a user preference, not stored in the .blend
+    if fast:
+        setup_eevee()
+    elif scene.render.engine == 'CYCLES':
+        setup_gpu()
+
     # Make sure we render with transparent background
     scene.render.film_transparent = True
-    scene.render.image_settings.file_format = 'PNG'
-    scene.render.image_settings.color_mode = 'RGBA'
+    scene.render.resolution_percentage = RESOLUTION_PERCENTAGE
 
     # Hide background plane if it exists
     bg_plane = bpy.data.objects.get("BackgroundPlane")
     if bg_plane:
         bg_plane.hide_render = True
 
-    temp_dir = tempfile.mkdtemp()
-
-    frame_width = scene.render.resolution_x
-    frame_height = scene.render.resolution_y
-
-    print(f"Rendering {FRAME_COUNT} frames at {frame_width}x{frame_height}...")
-
-    for frame in range(1, FRAME_COUNT + 1):
-        scene.frame_set(frame)
-        scene.render.filepath = os.path.join(temp_dir, f"frame_{frame:03d}.png")
-        bpy.ops.render.render(write_still=True)
-        print(f"  Frame {frame}/{FRAME_COUNT}")
-
-    print("Combining into sprite sheet...")
-
-    first_frame = bpy.data.images.load(os.path.join(temp_dir, "frame_001.png"))
-    width = first_frame.size[0]
-    height = first_frame.size[1]
-
-    sheet = bpy.data.images.new(
-        name="SpriteSheet",
-        width=width * FRAME_COUNT,
-        height=height,
-        alpha=True
-    )
-
-    sheet_pixels = list(sheet.pixels)
-
-    for frame in range(1, FRAME_COUNT + 1):
-        frame_path = os.path.join(temp_dir, f"frame_{frame:03d}.png")
-        frame_img = bpy.data.images.load(frame_path)
-        frame_pixels = list(frame_img.pixels)
-
-        x_offset = (frame - 1) * width
-        for y in range(height):
-            for x in range(width):
-                src_idx = (y * width + x) * 4
-                dst_idx = (y * width * FRAME_COUNT + x_offset + x) * 4
-                sheet_pixels[dst_idx:dst_idx+4] = frame_pixels[src_idx:src_idx+4]
-
-        bpy.data.images.remove(frame_img)
-
-    sheet.pixels = sheet_pixels
-
-    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-    sheet.filepath_raw = OUTPUT_FILE
-    sheet.file_format = 'PNG'
-    sheet.save()
-
-    print(f"Sprite sheet saved to: {OUTPUT_FILE}")
-
-    bpy.data.images.remove(first_frame)
-    bpy.data.images.remove(sheet)
-    shutil.rmtree(temp_dir)
-
 
 def main():
+    args = parse_script_args(render_arg_parser(__doc__))
+
     print("=" * 50)
     print("Ball Tweaker - Adding roundness to white side")
     print("=" * 50)
 
     tweak_white_material()
     tweak_lighting()
-    render_sprite_sheet()
+    setup_render_for_sprite(fast=args.fast)
+    workers = args.workers if args.workers is not None else default_workers(FRAME_COUNT)
+    render_sprite_sheet(OUTPUT_FILE, FRAME_COUNT, workers=workers)
 
     print("Done!")
 